@@ -0,0 +1,257 @@
+import argparse
+import hashlib
+import json
+import math
+import re
+from pathlib import Path
+
+
+GAME_DIR = Path(__file__).resolve().parent
+
+# Giá trị mặc định khi không đọc được từ js/utils/constants.js
+DEFAULT_MAP_CONFIG = {
+    'TILE_SIZE': 16,
+    'MAP_WIDTH': 250,
+    'MAP_HEIGHT': 180,
+    'CANVAS_WIDTH': 1280,
+    'CANVAS_HEIGHT': 720,
+}
+
+# Asset Screen1 tải ngay khi vào map, kèm file JS tham chiếu tới nó. Các helper console
+# (window.spawn, window.house trong setupConsoleCommands) không tính vì chỉ chạy khi gõ lệnh.
+STARTUP_ASSETS = (
+    ('js/ui/screens/Screen1.js', 'assets/sprites/caolo.png'),         # spawnRandomCaoLo
+    ('js/ui/components/ResourceBar.js', 'assets/sprites/wood.png'),
+    ('js/ui/components/DialogPanel.js', 'assets/dialog/player.png'),
+    ('js/ui/components/DialogPanel.js', 'assets/dialog/caolodia.png'),
+)
+
+ASSET_KINDS = {
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.webp': 'image', '.gif': 'image',
+    '.mp3': 'audio', '.ogg': 'audio', '.wav': 'audio',
+    '.mp4': 'video', '.webm': 'video',
+}
+# Thứ tự tier cố định; các vùng map bắt đầu từ ZONE_TIER_START
+BOOT_TIER, CRITICAL_TIER, INTERACTION_TIER, ZONE_TIER_START = 0, 1, 2, 3
+
+# Trong cùng một tier: ảnh nhỏ trước, audio/video nặng sau
+KIND_ORDER = {'image': 0, 'other': 1, 'audio': 2, 'video': 3}
+
+
+def read_constants(constants_path: Path):
+    """Lấy kích thước map/canvas và các *_PATH (player, tileset) từ constants.js."""
+    source = constants_path.read_text(encoding='utf-8') if constants_path.exists() else ''
+    config = dict(DEFAULT_MAP_CONFIG)
+    for key in config:
+        m = re.search(rf'\b{key}:\s*(\d+)', source)
+        if m:
+            config[key] = int(m.group(1))
+    # Sprite của player và tileset luôn cần ngay khi vào map
+    paths = []
+    for block in ('MAP_CONFIG', 'PLAYER_CONFIG'):
+        m = re.search(rf'const {block}\s*=\s*\{{(.*?)\n\}};', source, re.DOTALL)
+        if m:
+            paths += re.findall(r"\w+_PATH:\s*'([^']+)'", m.group(1))
+    return config, paths
+
+
+def read_boot_assets(game_dir: Path):
+    """Asset LoadingScreen chờ (GAME_ASSETS trong constants.js) và các src="assets/..." trong index.html."""
+    paths = []
+    constants = game_dir / 'js' / 'utils' / 'constants.js'
+    if constants.is_file():
+        m = re.search(r'const GAME_ASSETS\s*=\s*\{(.*?)\n\};', constants.read_text(encoding='utf-8'), re.DOTALL)
+        if m:
+            paths += re.findall(r"""['"]([^'"]+)['"]""", m.group(1))
+    index = game_dir / 'index.html'
+    if index.is_file():
+        paths += re.findall(r'\bsrc="(assets/[^"]+)"', index.read_text(encoding='utf-8'))
+    return list(dict.fromkeys(paths))
+
+
+def stale_startup_assets(game_dir: Path):
+    """Những mục STARTUP_ASSETS mà file JS tương ứng không còn nhắc tới (danh sách cần cập nhật)."""
+    stale = []
+    for source, asset in STARTUP_ASSETS:
+        path = game_dir / source
+        if not path.is_file() or f"'{asset}'" not in path.read_text(encoding='utf-8'):
+            stale.append(f'{source}: {asset}')
+    return stale
+
+
+def file_info(game_dir: Path, rel_path: str):
+    path = game_dir / rel_path
+    if not path.is_file():
+        return None
+    data = path.read_bytes()
+    return {
+        'path': rel_path,
+        'kind': ASSET_KINDS.get(path.suffix.lower(), 'other'),
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def object_rect(obj):
+    return obj['x'], obj['y'], obj['x'] + obj.get('width', 0), obj['y'] + obj.get('height', 0)
+
+
+def intersects(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def estimate_ms(total_bytes: int, requests: int, bandwidth_mbps: float, rtt_ms: float, parallel: int) -> int:
+    # Mô hình đơn giản: mỗi "đợt" request song song tốn 1 RTT, cộng thời gian truyền toàn bộ byte
+    transfer = total_bytes * 8 / (bandwidth_mbps * 1_000_000) * 1000
+    return round(rtt_ms * math.ceil(requests / parallel) + transfer) if requests else 0
+
+
+def build_manifest(game_dir: Path, map_data, regions_x: int, regions_y: int, spawn_margin: int,
+                   bandwidth_mbps: float, rtt_ms: float, parallel: int,
+                   critical_assets=()):
+    config, critical_paths = read_constants(game_dir / 'js' / 'utils' / 'constants.js')
+    critical_paths += [asset for _, asset in STARTUP_ASSETS] + list(critical_assets)
+    world_w = config['MAP_WIDTH'] * config['TILE_SIZE']
+    world_h = config['MAP_HEIGHT'] * config['TILE_SIZE']
+    # Screen1 đặt player ở giữa map; camera bao quanh player
+    spawn_x, spawn_y = world_w / 2, world_h / 2
+    half_w = config['CANVAS_WIDTH'] / 2 + spawn_margin
+    half_h = config['CANVAS_HEIGHT'] / 2 + spawn_margin
+    spawn_rect = (spawn_x - half_w, spawn_y - half_h, spawn_x + half_w, spawn_y + half_h)
+
+    region_w, region_h = world_w / regions_x, world_h / regions_y
+    regions = []
+    for ry in range(regions_y):
+        for rx in range(regions_x):
+            cx, cy = (rx + 0.5) * region_w, (ry + 0.5) * region_h
+            regions.append({
+                'id': f'r{ry}c{rx}',
+                'rect': [round(rx * region_w), round(ry * region_h), round((rx + 1) * region_w), round((ry + 1) * region_h)],
+                'distance': math.hypot(cx - spawn_x, cy - spawn_y),
+            })
+    regions.sort(key=lambda r: r['distance'])
+    region_rank = {r['id']: ZONE_TIER_START + i for i, r in enumerate(regions)}
+
+    # tier của mỗi asset = tier sớm nhất có object dùng tới nó
+    first_tier = {path: BOOT_TIER for path in read_boot_assets(game_dir)}
+    for path in critical_paths:
+        first_tier.setdefault(path, CRITICAL_TIER)
+    object_counts = {}
+    for obj in map_data.get('objects', []):
+        rect = object_rect(obj)
+        if intersects(rect, spawn_rect):
+            tier = CRITICAL_TIER
+        else:
+            cx, cy = (rect[0] + rect[2]) / 2, (rect[1] + rect[3]) / 2
+            rx = min(regions_x - 1, max(0, int(cx // region_w)))
+            ry = min(regions_y - 1, max(0, int(cy // region_h)))
+            tier = region_rank[f'r{ry}c{rx}']
+        sprite = obj.get('spritePath')
+        if sprite:
+            first_tier[sprite] = min(first_tier.get(sprite, tier), tier)
+            object_counts[sprite] = object_counts.get(sprite, 0) + 1
+        # Gốc cây chỉ xuất hiện sau khi chặt: không cần cho lần vẽ đầu tiên nhưng
+        # cần trước khi người chơi đi sang vùng khác (nhiệm vụ đầu là chặt cây)
+        stump = obj.get('stumpPath')
+        if stump:
+            first_tier[stump] = min(first_tier.get(stump, INTERACTION_TIER), max(tier, INTERACTION_TIER))
+            object_counts[stump] = object_counts.get(stump, 0) + 1
+
+    idle_tier = ZONE_TIER_START + len(regions)
+    for path in sorted(p.relative_to(game_dir).as_posix() for p in (game_dir / 'assets').rglob('*') if p.is_file()):
+        first_tier.setdefault(path, idle_tier)
+
+    tiers = [
+        {'tier': BOOT_TIER, 'name': 'boot', 'region': None, 'assets': []},
+        {'tier': CRITICAL_TIER, 'name': 'critical', 'region': None, 'assets': []},
+        {'tier': INTERACTION_TIER, 'name': 'after-interaction', 'region': None, 'assets': []},
+    ]
+    tiers += [{'tier': ZONE_TIER_START + i, 'name': 'zone', 'region': r['id'], 'rect': r['rect'], 'assets': []} for i, r in enumerate(regions)]
+    tiers.append({'tier': idle_tier, 'name': 'idle', 'region': None, 'assets': []})
+    missing = []
+    for path, tier in sorted(first_tier.items(), key=lambda item: (item[1], item[0])):
+        info = file_info(game_dir, path)
+        if info is None:
+            missing.append(path)
+            continue
+        if path in object_counts:
+            info['objects'] = object_counts[path]
+        tiers[tier]['assets'].append(info)
+
+    ready = 0
+    for tier in tiers:
+        tier['assets'].sort(key=lambda a: (KIND_ORDER[a['kind']], a['bytes'], a['path']))
+        tier['bytes'] = sum(a['bytes'] for a in tier['assets'])
+        tier['estimatedMs'] = estimate_ms(tier['bytes'], len(tier['assets']), bandwidth_mbps, rtt_ms, parallel)
+        # Các tier tải lần lượt từ tier 0: thời điểm sẵn sàng là tổng dồn
+        ready += tier['estimatedMs']
+        tier['readyAtMs'] = ready
+    # Người chơi tương tác được khi boot (màn loading) và critical (vùng spawn) đã tải xong
+    time_to_interactive = tiers[CRITICAL_TIER]['readyAtMs']
+    # Bỏ các vùng không có asset mới và đánh số lại cho liên tục
+    tiers = [t for t in tiers if t['assets'] or t['name'] in ('boot', 'critical')]
+    for i, tier in enumerate(tiers):
+        tier['tier'] = i
+
+    return {
+        'version': '1.0',
+        'generatedFrom': 'map_data.json',
+        'spawn': {'x': spawn_x, 'y': spawn_y, 'rect': [round(v) for v in spawn_rect]},
+        'network': {'bandwidthMbps': bandwidth_mbps, 'rttMs': rtt_ms, 'parallel': parallel},
+        'staleStartupAssets': stale_startup_assets(game_dir),
+        'timeToInteractiveMs': time_to_interactive,
+        'tiers': tiers,
+        'missing': missing,
+    }
+
+
+def region_grid(value: str):
+    m = re.fullmatch(r'\s*(\d+)\s*[xX]\s*(\d+)\s*', value)
+    if not m or int(m.group(1)) <= 0 or int(m.group(2)) <= 0:
+        raise argparse.ArgumentTypeError(f"expected positive COLSxROWS, e.g. 4x3 (got '{value}')")
+    return int(m.group(1)), int(m.group(2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a zone-based asset preload manifest from map_data.json.')
+    parser.add_argument('--map', default=str(GAME_DIR / 'map_data.json'), help='Path to map_data.json')
+    parser.add_argument('--out', default=str(GAME_DIR / 'preload_manifest.json'), help='Output manifest path')
+    parser.add_argument('--regions', type=region_grid, default=(4, 3), help='Region grid as COLSxROWS (default: 4x3)')
+    parser.add_argument('--spawn-margin', type=int, default=256,
+                        help='Extra pixels around the spawn viewport treated as critical (default: 256)')
+    parser.add_argument('--bandwidth-mbps', type=float, default=10.0, help='Assumed bandwidth for estimates (default: 10)')
+    parser.add_argument('--rtt-ms', type=float, default=100.0, help='Assumed round-trip time (default: 100)')
+    parser.add_argument('--parallel', type=int, default=6, help='Concurrent requests per origin (default: 6)')
+    parser.add_argument('--critical-asset', action='append', default=[],
+                        help='Extra asset path (relative to game/) forced into tier 0')
+    args = parser.parse_args()
+    if args.bandwidth_mbps <= 0:
+        parser.error('--bandwidth-mbps must be positive')
+    if args.rtt_ms < 0:
+        parser.error('--rtt-ms must not be negative')
+    if args.parallel <= 0:
+        parser.error('--parallel must be positive')
+
+    regions_x, regions_y = args.regions
+    with open(args.map, 'r', encoding='utf-8') as f:
+        map_data = json.load(f)
+
+    manifest = build_manifest(GAME_DIR, map_data, regions_x, regions_y, args.spawn_margin,
+                              args.bandwidth_mbps, args.rtt_ms, args.parallel, args.critical_asset)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    for tier in manifest['tiers']:
+        label = tier['name'] if tier['region'] is None else f"{tier['name']} {tier['region']}"
+        print(f"Tier {tier['tier']:>2} {label:18} {len(tier['assets']):>3} assets {tier['bytes']:>10} bytes  "
+              f"+{tier['estimatedMs']} ms  (sẵn sàng ~{tier['readyAtMs']} ms)")
+    print(f"✅ Time-to-interactive ước tính: ~{manifest['timeToInteractiveMs']} ms")
+    print("ℹ️ Tham chiếu asset trong JS ngoài STARTUP_ASSETS và --critical-asset không được tính")
+    if manifest['staleStartupAssets']:
+        print(f"⚠️ STARTUP_ASSETS không còn khớp mã JS: {manifest['staleStartupAssets']}")
+    if manifest['missing']:
+        print(f"⚠️ Thiếu {len(manifest['missing'])} file: {manifest['missing']}")
+
+
+if __name__ == '__main__':
+    main()
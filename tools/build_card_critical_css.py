@@ -0,0 +1,481 @@
+import argparse
+import hashlib
+import json
+import re
+import shutil
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+
+# Phần hiển thị ngay khi mở thẻ (hero + khối "Tổng quan" đầu tiên)
+DEFAULT_FOLD_CLASSES = ('hero-section', 'memorial-section')
+
+STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+LINK_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+NOSCRIPT_RE = re.compile(r'<noscript\b.*?</noscript>', re.IGNORECASE | re.DOTALL)
+IMPORT_RE = re.compile(r"""@import\s+url\(\s*['"]?([^'")]+)['"]?\s*\)""", re.IGNORECASE)
+IMPORT_STATEMENT_RE = re.compile(r"""@import\s+(?:url\([^)]*\)|'[^']*'|"[^"]*")[^;]*;""", re.IGNORECASE)
+URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+PLACEHOLDER_RE = re.compile(r'__CARD_URL_(\d+)__')
+# Chỉ những file CSS do chính công cụ này ghi ra (tên kèm hash nội dung)
+GENERATED_CSS_RE = re.compile(r'^(?:card|fontawesome-subset)\.[0-9a-f]{10}\.css$')
+ICON_CLASS_RE = re.compile(r'\bfa-[a-z0-9-]+\b')
+GLYPH_SELECTOR_RE = re.compile(r'^\.(fa-[a-z0-9-]+)(?:::?before|::?after)?$')
+GLYPH_BODY_RE = re.compile(r'^\s*(?:content|--fa)\s*:[^;]*;?\s*$')
+# Trạng thái tương tác không bao giờ xuất hiện ở lần vẽ đầu tiên
+INTERACTIVE_PSEUDO_RE = re.compile(r':(?:hover|focus|focus-within|focus-visible|active|visited)\b')
+PSEUDO_RE = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+# Kiểu biểu tượng Font Awesome, không phải glyph
+ICON_STYLE_CLASSES = {'fa-solid', 'fa-regular', 'fa-brands', 'fa-light', 'fa-thin', 'fa-duotone'}
+
+
+class FoldCollector(HTMLParser):
+    """Thu thập các phần tử nằm trong vùng above-the-fold cùng tổ tiên của chúng."""
+
+    def __init__(self, fold_classes):
+        super().__init__(convert_charrefs=True)
+        self.pending = list(fold_classes)
+        self.stack: List[Tuple[str, frozenset, Optional[str]]] = []
+        self.capture_depth: Optional[int] = None
+        self.elements: Dict[Tuple, Tuple] = {}
+
+    def _record(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = frozenset((attrs.get('class') or '').split())
+        node = (tag, classes, attrs.get('id'))
+        if self.capture_depth is None:
+            root = next((c for c in self.pending if c in classes), None)
+            if root is not None:
+                self.pending.remove(root)
+                self.capture_depth = len(self.stack)
+                # Tổ tiên của vùng fold cũng được vẽ (html, body, main, container...)
+                for i, ancestor in enumerate(self.stack):
+                    self.elements[(ancestor, tuple(self.stack[:i]))] = (ancestor, tuple(self.stack[:i]))
+        if self.capture_depth is not None:
+            key = (node, tuple(self.stack))
+            self.elements[key] = (node, tuple(self.stack))
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._record(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._record(tag, attrs)
+
+    def handle_endtag(self, tag):
+        while self.stack:
+            node = self.stack.pop()
+            if self.capture_depth is not None and len(self.stack) <= self.capture_depth:
+                self.capture_depth = None
+            if node[0] == tag:
+                break
+
+
+def collect_fold_elements(html: str, fold_classes) -> List[Tuple]:
+    collector = FoldCollector(fold_classes)
+    collector.feed(html)
+    collector.close()
+    return list(collector.elements.values())
+
+
+def parse_css(text: str) -> List[Tuple]:
+    """Tách stylesheet thành ('statement', prelude), ('rule', selector, body),
+    ('group', prelude, children) cho @media/@supports và ('block', prelude, body)
+    cho các at-rule khác (@keyframes, @font-face)."""
+    text = COMMENT_RE.sub('', text)
+    nodes = []
+    i, n = 0, len(text)
+    while i < n:
+        m = re.compile(r'[{;]').search(text, i)
+        if not m:
+            break
+        j = m.start()
+        prelude = text[i:j].strip()
+        if text[j] == ';':
+            if prelude:
+                nodes.append(('statement', prelude))
+            i = j + 1
+            continue
+        depth, k = 0, j
+        while k < n:
+            if text[k] == '{':
+                depth += 1
+            elif text[k] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            k += 1
+        body = text[j + 1:k]
+        lowered = prelude.lower()
+        if lowered.startswith('@media') or lowered.startswith('@supports'):
+            nodes.append(('group', prelude, parse_css(body)))
+        elif prelude.startswith('@'):
+            nodes.append(('block', prelude, body))
+        else:
+            nodes.append(('rule', prelude, body))
+        i = k + 1
+    return nodes
+
+
+def compact_declarations(body: str) -> str:
+    body = ' '.join(body.split())
+    body = re.sub(r'\s*;\s*', ';', body)
+    body = re.sub(r'\s*:\s+', ':', body)
+    return body.strip().rstrip(';')
+
+
+def serialize(nodes) -> str:
+    out = []
+    for node in nodes:
+        kind = node[0]
+        if kind == 'statement':
+            out.append(node[1] + ';')
+        elif kind == 'rule':
+            selector = ','.join(s.strip() for s in node[1].split(','))
+            out.append(f"{selector}{{{compact_declarations(node[2])}}}")
+        elif kind == 'group':
+            out.append(f"{' '.join(node[1].split())}{{{serialize(node[2])}}}")
+        else:
+            inner = serialize(parse_css(node[2])) if '{' in node[2] else compact_declarations(node[2])
+            out.append(f"{' '.join(node[1].split())}{{{inner}}}")
+    return ''.join(out)
+
+
+def compound_matches(compound: str, node) -> bool:
+    tag, classes, element_id = node
+    compound = ATTRIBUTE_RE.sub('', PSEUDO_RE.sub('', compound))
+    name = re.match(r'^[a-zA-Z][\w-]*|^\*', compound)
+    if name and name.group(0) != '*' and name.group(0).lower() != tag:
+        return False
+    if not set(re.findall(r'\.([\w-]+)', compound)) <= classes:
+        return False
+    wanted_id = re.findall(r'#([\w-]+)', compound)
+    return not wanted_id or wanted_id[0] == element_id
+
+
+def selector_matches(selector: str, elements) -> bool:
+    if INTERACTIVE_PSEUDO_RE.search(selector):
+        return False
+    compounds = [c for c in re.split(r'\s*[>+~]\s*|\s+', selector.strip()) if c]
+    if not compounds:
+        return False
+    target, context = compounds[-1], compounds[:-1]
+    all_nodes = [node for node, _ in elements]
+    for node, ancestors in elements:
+        if not compound_matches(target, node):
+            continue
+        # Gần đúng cho combinator: chỉ cần mỗi phần trước khớp một tổ tiên hoặc phần tử trong fold
+        if all(any(compound_matches(c, a) for a in ancestors + tuple(all_nodes)) for c in context):
+            return True
+    return False
+
+
+def animation_names(nodes) -> Set[str]:
+    names = set()
+    for node in nodes:
+        if node[0] == 'rule':
+            for m in re.finditer(r'animation(?:-name)?\s*:([^;]*)', node[2]):
+                names.update(re.findall(r'[\w-]+', m.group(1)))
+        elif node[0] == 'group':
+            names |= animation_names(node[2])
+    return names
+
+
+def split_critical(nodes, elements) -> Tuple[List, List]:
+    critical, rest = [], []
+    for node in nodes:
+        kind = node[0]
+        if kind == 'rule':
+            (critical if any(selector_matches(s, elements) for s in node[1].split(',')) else rest).append(node)
+        elif kind == 'group':
+            inner_critical, inner_rest = split_critical(node[2], elements)
+            if inner_critical:
+                critical.append(('group', node[1], inner_critical))
+            if inner_rest:
+                rest.append(('group', node[1], inner_rest))
+        elif kind == 'block' and node[1].lower().startswith('@font-face'):
+            critical.append(node)
+        else:
+            rest.append(node)
+    # @keyframes chỉ được inline khi một rule critical dùng tới
+    used = animation_names(critical)
+    keyframes = [n for n in rest if n[0] == 'block' and '@keyframes' in n[1].lower() and n[1].split()[-1] in used]
+    rest = [n for n in rest if n not in keyframes]
+    return critical + keyframes, rest
+
+
+def normalize_urls(css: str) -> Tuple[str, List[str]]:
+    """Thay url(...) riêng của từng thẻ (ảnh nền) bằng placeholder để các thẻ
+    cùng template chia sẻ một kết quả tính toán."""
+    urls: List[str] = []
+
+    def repl(m):
+        urls.append(m.group(0))
+        return f'__CARD_URL_{len(urls) - 1}__'
+
+    return URL_RE.sub(repl, css), urls
+
+
+def restore_urls(css: str, urls: List[str]) -> str:
+    return PLACEHOLDER_RE.sub(lambda m: urls[int(m.group(1))], css)
+
+
+def link_attr(tag: str, name: str) -> Optional[str]:
+    m = re.search(rf'\b{name}\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', tag, re.IGNORECASE)
+    return next((g for g in m.groups() if g is not None), None) if m else None
+
+
+def stylesheet_href(tag: str) -> Optional[str]:
+    """href của một <link> chặn render (rel=stylesheet, không phải media=print), bất kể thứ tự thuộc tính."""
+    rel = (link_attr(tag, 'rel') or '').lower().split()
+    if 'stylesheet' not in rel or (link_attr(tag, 'media') or '').lower() == 'print':
+        return None
+    return link_attr(tag, 'href')
+
+
+def count_blocking(html: str) -> int:
+    """Đếm request CSS chặn render trong <head>: <link rel=stylesheet> và @import trong <style>."""
+    head_end = html.lower().find('</head>')
+    head = NOSCRIPT_RE.sub('', html[:head_end] if head_end != -1 else html)
+    links = sum(1 for tag in LINK_TAG_RE.findall(head) if stylesheet_href(tag))
+    imports = sum(len(IMPORT_RE.findall(css)) for css in STYLE_RE.findall(head))
+    return links + imports
+
+
+def link_attrs(tag: str) -> List[Tuple[str, Optional[str]]]:
+    """Các thuộc tính của một <link> theo thứ tự gốc; thuộc tính boolean có giá trị None."""
+    body = re.sub(r'^<link\b|/?>$', '', tag, flags=re.IGNORECASE)
+    return [
+        (m.group(1).lower(), next((g for g in m.groups()[1:] if g is not None), None))
+        for m in LINK_ATTR_RE.finditer(body)
+    ]
+
+
+def async_stylesheet(href: str, attrs=()) -> str:
+    # Giữ media/integrity/crossorigin/referrerpolicy... cho cả preload lẫn bản <noscript>
+    extra = ''.join(
+        f' {name}' if value is None else f' {name}="{value.replace(chr(34), "&quot;")}"'
+        for name, value in attrs if name not in ('rel', 'href', 'as', 'onload')
+    )
+    return (
+        f'<link rel="preload" href="{href}" as="style"{extra} onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        f'    <noscript><link rel="stylesheet" href="{href}"{extra}></noscript>'
+    )
+
+
+def compute_template(style_css: str, html: str, fold_classes, cache: Dict[str, Dict]) -> Tuple[str, Dict]:
+    """Trả về (khóa template, kết quả); các thẻ cùng CSS và cấu trúc fold dùng chung một kết quả."""
+    imports = IMPORT_RE.findall(style_css)
+    normalized, _ = normalize_urls(IMPORT_STATEMENT_RE.sub('', style_css))
+    elements = collect_fold_elements(html, fold_classes)
+    # Chỉ những tag/class mà CSS nhắc tới mới ảnh hưởng kết quả (bỏ qua fa-*, <br>...)
+    tokens = set(re.findall(r'[\w-]+', normalized))
+    signature = sorted({(n[0] if n[0] in tokens else '', tuple(sorted(n[1] & tokens))) for n, _ in elements})
+    # imports nằm trong kết quả cache nên phải là một phần của khóa
+    key = hashlib.sha1((normalized + repr(signature) + repr(imports)).encode('utf-8')).hexdigest()[:10]
+    if key not in cache:
+        critical, rest = split_critical(parse_css(normalized), elements)
+        cache[key] = {'critical': serialize(critical), 'rest': serialize(rest), 'imports': imports}
+    return key, cache[key]
+
+
+def subset_fontawesome(css_text: str, used_icons: Set[str], base_href: str) -> str:
+    kept = []
+    for node in parse_css(css_text):
+        if node[0] == 'rule' and GLYPH_BODY_RE.match(node[2]):
+            selectors = [s.strip() for s in node[1].split(',')]
+            glyphs = [GLYPH_SELECTOR_RE.match(s) for s in selectors]
+            if all(glyphs):
+                selectors = [s for s, g in zip(selectors, glyphs) if g.group(1) in used_icons]
+                if not selectors:
+                    continue
+                node = ('rule', ','.join(selectors), node[2])
+        kept.append(node)
+    # Bản subset nằm ở chỗ khác so với CDN nên webfonts phải trỏ về URL tuyệt đối
+    return URL_RE.sub(lambda m: f'url({urljoin(base_href, m.group(2))})', serialize(kept))
+
+
+def write_shared(out_dir: Path, name: str, css: str) -> Path:
+    digest = hashlib.sha1(css.encode('utf-8')).hexdigest()[:10]
+    path = out_dir / 'css' / f'{name}.{digest}.css'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(css, encoding='utf-8')
+    return path
+
+
+def overlaps(a: Path, b: Path) -> bool:
+    return a == b or a in b.parents or b in a.parents
+
+
+def check_out_dir(card_dir: Path, out_dir: Path, repo_root: Path) -> Optional[str]:
+    """Trả về lý do từ chối nếu out_dir có thể ghi đè mã nguồn, ngược lại None."""
+    card_dir, out_dir, repo_root = card_dir.resolve(), out_dir.resolve(), repo_root.resolve()
+    if overlaps(out_dir, card_dir):
+        return f'{out_dir} overlaps the source card directory {card_dir}'
+    dist_dir = repo_root / 'dist'
+    if (out_dir == repo_root or repo_root in out_dir.parents) and not (out_dir == dist_dir or dist_dir in out_dir.parents):
+        return f'{out_dir} is inside the source tree; use a path under {dist_dir} or outside the repository'
+    return None
+
+
+def build_cards(card_dir: Path, out_dir: Path, fold_classes, fontawesome_css: Optional[Path] = None):
+    card_dir, out_dir = card_dir.resolve(), out_dir.resolve()
+    if overlaps(out_dir, card_dir):
+        raise ValueError(f'Output directory {out_dir} overlaps the source card directory {card_dir}')
+    shutil.copytree(card_dir, out_dir, dirs_exist_ok=True)
+    # Xóa file CSS đã hash của lần build trước để không tích tụ bản cũ
+    css_dir = out_dir / 'css'
+    if css_dir.is_dir():
+        for path in css_dir.iterdir():
+            if path.is_file() and GENERATED_CSS_RE.match(path.name):
+                path.unlink()
+    pages = sorted(card_dir.glob('*/index.html'))
+    sources = {p: p.read_text(encoding='utf-8') for p in pages}
+
+    used_icons: Set[str] = set()
+    for html in sources.values():
+        used_icons |= set(ICON_CLASS_RE.findall(html)) - ICON_STYLE_CLASSES
+
+    fa_href = next((href for html in sources.values() for tag in LINK_TAG_RE.findall(html)
+                    for href in [stylesheet_href(tag)] if href and 'font-awesome' in href), None)
+    fa_report = None
+    fa_local_href = None
+    if fa_href and fontawesome_css is None:
+        fa_report = {'subset': False, 'href': fa_href, 'icons': len(used_icons)}
+    elif fa_href:
+        fa_source = fontawesome_css.read_text(encoding='utf-8')
+        subset = subset_fontawesome(fa_source, used_icons, fa_href)
+        fa_path = write_shared(out_dir, 'fontawesome-subset', subset)
+        fa_local_href = (fa_href, '../css/' + fa_path.name)
+        fa_report = {
+            'subset': True,
+            'href': fa_href,
+            'icons': len(used_icons),
+            'bytes_before': len(fa_source.encode('utf-8')),
+            'bytes_after': len(subset.encode('utf-8')),
+        }
+
+    templates: Dict[str, Dict] = {}
+    shared_rest: Dict[str, str] = {}
+    report = []
+    for page, html in sources.items():
+        style = STYLE_RE.search(html)
+        if not style:
+            continue
+        blocking_before = count_blocking(html)
+
+        _, urls = normalize_urls(IMPORT_STATEMENT_RE.sub('', style.group(1)))
+        key, result = compute_template(style.group(1), html, fold_classes, templates)
+
+        critical = restore_urls(result['critical'], urls)
+        rest = result['rest']
+        if PLACEHOLDER_RE.search(rest):
+            # Phần còn lại vẫn chứa URL riêng của thẻ: giữ inline ở cuối body
+            deferred = f'<style id="deferred-css">{restore_urls(rest, urls)}</style>\n'
+            deferred_head = ''
+        else:
+            if key not in shared_rest:
+                # Đặt tên theo nội dung: các template có phần còn lại giống nhau dùng chung một file
+                shared_rest[key] = '../css/' + write_shared(out_dir, 'card', rest).name
+            deferred = ''
+            deferred_head = '\n    ' + async_stylesheet(shared_rest[key])
+
+        def relink(m):
+            href = stylesheet_href(m.group(0))
+            if href is None:
+                return m.group(0)
+            attrs = link_attrs(m.group(0))
+            if fa_local_href and href == fa_local_href[0]:
+                href = fa_local_href[1]
+                # Bản subset có nội dung khác nên hash SRI của CDN không còn đúng
+                attrs = [(n, v) for n, v in attrs if n not in ('integrity', 'crossorigin')]
+            return async_stylesheet(href, attrs)
+
+        # Đổi mọi <link> stylesheet trong <head>, cả trước lẫn sau thẻ <style>
+        head_end = html.lower().find('</head>')
+        head_end = head_end if head_end > style.end() else style.end()
+        new_html = LINK_TAG_RE.sub(relink, html[:style.start()])
+        new_html += '<style id="critical-css">' + critical + '</style>'
+        new_html += ''.join('\n    ' + async_stylesheet(href) for href in result['imports'])
+        new_html += deferred_head
+        new_html += LINK_TAG_RE.sub(relink, html[style.end():head_end])
+        tail = html[head_end:]
+        body_close = tail.lower().rfind('</body>')
+        if deferred and body_close != -1:
+            tail = tail[:body_close] + deferred + tail[body_close:]
+        new_html += tail
+
+        target = out_dir / page.relative_to(card_dir)
+        target.write_text(new_html, encoding='utf-8')
+        report.append({
+            'slug': page.parent.name,
+            'template': key,
+            'html_bytes_before': len(html.encode('utf-8')),
+            'html_bytes_after': len(new_html.encode('utf-8')),
+            'critical_bytes': len(critical.encode('utf-8')),
+            'blocking_requests_before': blocking_before,
+            'blocking_requests_after': count_blocking(new_html),
+        })
+
+    shared = {Path(href).name: (out_dir / 'css' / Path(href).name).stat().st_size for href in shared_rest.values()}
+    return report, {'templates': len(templates), 'shared_css_bytes': shared, 'fontawesome': fa_report}
+
+
+def print_report(report, summary):
+    print(f"{'slug':32} {'tmpl':10} {'html trước':>10} {'html sau':>10} {'critical':>9} {'blocking':>9}")
+    for row in report:
+        print(
+            f"{row['slug'][:32]:32} {row['template']:10} {row['html_bytes_before']:>10} "
+            f"{row['html_bytes_after']:>10} {row['critical_bytes']:>9} "
+            f"{row['blocking_requests_before']:>4} -> {row['blocking_requests_after']}"
+        )
+    if report:
+        before = sum(r['html_bytes_before'] for r in report)
+        after = sum(r['html_bytes_after'] for r in report)
+        print(f'CARDS: {len(report)}  TEMPLATES: {summary["templates"]}')
+        print(f'HTML BYTES: {before} -> {after} ({after - before:+d})')
+        for name, size in summary['shared_css_bytes'].items():
+            print(f'SHARED CSS {name}: {size} bytes (tải bất đồng bộ, cache chung cho mọi thẻ)')
+    fa = summary['fontawesome']
+    if fa and fa['subset']:
+        print(f"FONT AWESOME: {fa['icons']} icons, {fa['bytes_before']} -> {fa['bytes_after']} bytes")
+    elif fa:
+        print(f"⚠️ FONT AWESOME: KHÔNG subset ({fa['icons']} icons đang dùng) - vẫn tải đầy đủ {fa['href']}. "
+              f"Truyền --fontawesome-css <all.min.css> để loại glyph không dùng.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inline critical CSS for card landing pages and defer the rest.')
+    parser.add_argument('--out', default=None, help='Output directory (default: dist/card)')
+    parser.add_argument('--fold-class', action='append', default=None,
+                        help=f'Class of an above-the-fold root element (default: {", ".join(DEFAULT_FOLD_CLASSES)})')
+    parser.add_argument('--fontawesome-css', default=None,
+                        help='Local copy of Font Awesome all.min.css to subset to the icons used by the cards')
+    parser.add_argument('--report', default=None, help='Write the page-weight report as JSON to this path')
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).resolve().parents[1]
+    out_dir = Path(args.out) if args.out else repo_root / 'dist' / 'card'
+    reason = check_out_dir(repo_root / 'card', out_dir, repo_root)
+    if reason:
+        parser.error(f'--out: {reason}')
+    fa_css = Path(args.fontawesome_css) if args.fontawesome_css else None
+    report, summary = build_cards(repo_root / 'card', out_dir, tuple(args.fold_class or DEFAULT_FOLD_CLASSES), fa_css)
+    print_report(report, summary)
+    if args.report:
+        Path(args.report).write_text(
+            json.dumps({'cards': report, 'summary': summary}, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+
+
+if __name__ == '__main__':
+    main()